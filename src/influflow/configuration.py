@@ -1,7 +1,9 @@
 import os
 from enum import Enum
 from dataclasses import dataclass, fields, field
-from typing import Any, Optional, Dict, Literal
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Optional, Literal, Mapping
 
 from langchain_core.runnables import RunnableConfig
 
@@ -16,37 +18,61 @@ class SearchAPI(Enum):
     GOOGLESEARCH = "googlesearch"
     NONE = "none"
 
-@dataclass(kw_only=True)
+# 共享的只读默认值，避免每个实例都新建dict；需要修改时先 dict(...) 复制
+_DEFAULT_SEARCH_API_CONFIG = MappingProxyType({"max_results": 5})
+_DEFAULT_WRITER_MODEL_KWARGS = MappingProxyType({"temperature": 0.7})  # 提高创造性
+
+@lru_cache(maxsize=None)
+def _init_field_env_keys(cls) -> tuple[tuple[str, str], ...]:
+    """(field name, environment variable name) for each init field of cls, computed once per class."""
+    return tuple((f.name, f.name.upper()) for f in fields(cls) if f.init)
+
+@lru_cache(maxsize=32)
+def _cached_instance(cls, items: tuple[tuple[str, Any], ...]):
+    """Build cls from resolved field values, reusing the instance for identical values."""
+    return cls(**dict(items))
+
+# eq=False：映射字段（默认的MappingProxyType或configurable传入的dict）不可哈希，
+# 生成的按值__hash__会直接报错；改用按对象身份比较和哈希，相同设置由from_runnable_config复用同一实例
+@dataclass(kw_only=True, slots=True, frozen=True, eq=False)
 class WorkflowConfiguration:
     """Configuration for the influflow Twitter thread generation workflow."""
     
     # Search configuration
     search_api: SearchAPI = SearchAPI.TAVILY
-    search_api_config: Optional[Dict[str, Any]] = field(default_factory=lambda: {"max_results": 5})
+    search_api_config: Optional[Mapping[str, Any]] = field(default_factory=lambda: _DEFAULT_SEARCH_API_CONFIG)
     process_search_results: Literal["summarize", "split_and_rerank"] | None = "split_and_rerank"
     
     # Model configuration
     number_of_queries: int = 3  # 增加查询数量以获得更丰富的内容
     writer_provider: str = "openai"
     writer_model: str = "gpt-4.1"
-    writer_model_kwargs: Optional[Dict[str, Any]] = field(default_factory=lambda: {"temperature": 0.7})  # 提高创造性
+    writer_model_kwargs: Optional[Mapping[str, Any]] = field(default_factory=lambda: _DEFAULT_WRITER_MODEL_KWARGS)
 
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
     ) -> "WorkflowConfiguration":
-        """Create a WorkflowConfiguration instance from a RunnableConfig."""
+        """Create a WorkflowConfiguration instance from a RunnableConfig.
+
+        Instances are memoized on the resolved field values, so repeated calls with the
+        same settings return the same (frozen) object; use dataclasses.replace to derive variants.
+        """
         configurable = (
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
-            for f in fields(cls)
-            if f.init
+            name: os.environ.get(env_key, configurable.get(name))
+            for name, env_key in _init_field_env_keys(cls)
         }
         # 过滤掉None值
         filtered_values = {k: v for k, v in values.items() if v is not None}
-        return cls(**filtered_values)
+        try:
+            # 字段名唯一，排序只比较键，不会比较值
+            return _cached_instance(cls, tuple(sorted(filtered_values.items())))
+        except TypeError:
+            # 含不可哈希的值（如通过configurable传入的dict），不缓存
+            return cls(**filtered_values)
 
 # Keep the old Configuration class for backward compatibility
 Configuration = WorkflowConfiguration
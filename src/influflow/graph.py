@@ -44,7 +44,7 @@ async def generate_tweet_thread(state: InfluflowState, config: RunnableConfig):
     # 设置生成模型
     writer_provider = get_config_value(configurable.writer_provider)
     writer_model_name = get_config_value(configurable.writer_model)
-    writer_model_kwargs = get_config_value(configurable.writer_model_kwargs or {})
+    writer_model_kwargs = dict(configurable.writer_model_kwargs or {})  # 默认值是只读映射，复制一份再传给模型
     
     # 初始化模型并设置结构化输出
     writer_model = init_chat_model(
@@ -33,6 +33,14 @@ class Outline(BaseModel):
         description="List of outline nodes"
     )
     
+    def all_leaf_nodes(self) -> List[OutlineLeafNode]:
+        """Flatten the outline into its leaf nodes
+        
+        Returns:
+            All leaf nodes (tweets) in thread order
+        """
+        return [leaf_node for node in self.nodes for leaf_node in node.leaf_nodes]
+    
     def display_tweet_thread(self) -> str:
         """Display tweet thread
         
@@ -40,10 +48,7 @@ class Outline(BaseModel):
             Formatted tweet thread string in format: (1/n) tweet1, (2/n) tweet2...
         """
         # 收集所有的tweet内容
-        all_tweets = []
-        for node in self.nodes:
-            for leaf_node in node.leaf_nodes:
-                all_tweets.append(leaf_node.tweet_content)
+        all_tweets = [leaf_node.tweet_content for leaf_node in self.all_leaf_nodes()]
         
         # 计算总数
         total_tweets = len(all_tweets)
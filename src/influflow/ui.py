@@ -5,69 +5,109 @@ Twitter Thread Generator UI
 
 import streamlit as st
 import asyncio
-from typing import Dict, Any
+import atexit
+import concurrent.futures
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Optional
 import uuid
 
 # 导入graph
 from influflow.graph import graph
+from influflow.utils import close_http_session
 
 
+# 可选模型与语言（模块级常量，避免每次rerun重新构建）
+AVAILABLE_MODELS = ["gpt-4.1", "gpt-4.1-mini", "gpt-4o-mini", "gpt-4o"]
+AVAILABLE_LANGUAGES = [
+    ("英文", "English"),
+    ("中文", "Chinese")
+]
+LANGUAGE_OPTIONS = [f"{name} ({code})" for name, code in AVAILABLE_LANGUAGES]
+# 显示文本 -> 语言代码，替代每次rerun的list.index线性查找
+LANGUAGE_CODE_BY_OPTION = {
+    option: code for option, (_, code) in zip(LANGUAGE_OPTIONS, AVAILABLE_LANGUAGES)
+}
+
+# 会话内最多保留的历史记录条数，避免长时间会话内存无限增长
+MAX_HISTORY = 20
+
+
+# 计为2个字符的宽字符：中文字符、中文标点符号及全角字符
+_WIDE_CHAR_RE = re.compile('[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]')
+
+
+@lru_cache(maxsize=4096)
 def count_twitter_chars(text: str) -> int:
     """
     统计Twitter字符数，中文字符计为2个字符，英文字符计为1个字符
+    
+    结果按推文内容缓存，Streamlit每次rerun重新渲染时无需再逐字符扫描
     """
-    char_count = 0
-    for char in text:
-        # 判断是否为中文字符（包括中文标点符号）
-        if '\u4e00' <= char <= '\u9fff' or '\u3000' <= char <= '\u303f' or '\uff00' <= char <= '\uffef':
-            char_count += 2  # 中文字符计为2个字符
-        else:
-            char_count += 1  # 英文字符计为1个字符
-    return char_count
+    # 宽字符额外计1个字符；subn在C层一次扫描完成计数
+    wide_char_count = _WIDE_CHAR_RE.subn('', text)[1]
+    return len(text) + wide_char_count
 
 
-def safe_asyncio_run(coro):
-    """
-    安全地在同步环境中运行异步协程，特别是在Streamlit中
-    """
-    try:
-        try:
-            # 尝试获取当前线程中正在运行的事件循环
-            asyncio.get_running_loop()
-            
-            # 如果存在正在运行的循环，在一个新线程中运行协程以避免冲突
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, coro)
-                return future.result()
+def char_count_caption(text: str) -> str:
+    """生成推文字符数提示文本，超过280字符时给出警告"""
+    char_count = count_twitter_chars(text)
+    if char_count > 280:
+        return f"⚠️ 字符数: {char_count}/280 (超出限制)"
+    return f"✅ 字符数: {char_count}/280"
 
-        except RuntimeError:
-            # 如果没有正在运行的循环，直接运行
-            return asyncio.run(coro)
-            
+
+# 后台事件循环（整个进程共享一个，在守护线程中常驻运行）
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """获取后台事件循环，首次调用时在守护线程中启动"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True, name="influflow-ui-loop").start()
+            _LOOP = loop
+            atexit.register(_shutdown_loop, loop)
+    return _LOOP
+
+
+def _shutdown_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """进程退出时在后台事件循环上关闭共享的HTTP会话，释放连接池"""
+    try:
+        asyncio.run_coroutine_threadsafe(close_http_session(), loop).result(timeout=5)
     except Exception as e:
-        print(f"Error in async operation: {e}")
-        return {"status": "error", "error": f"Async execution error: {str(e)}"}
+        print(f"Error closing HTTP session: {e}")
+    loop.call_soon_threadsafe(loop.stop)
 
 
-async def generate_thread_async(topic: str, language: str, config: Dict[str, Any]):
+async def generate_thread_async(
+    topic: str,
+    language: str,
+    config: Dict[str, Any]
+):
     """异步生成Twitter thread"""
     try:
         # 准备输入数据 - 现在包含topic和language
         input_data = {"topic": topic, "language": language}
         
-        # 流式获取结果
-        final_result = None
+        # 流式获取结果：只保留最终节点的输出，中间事件不再持有引用
+        # 不提前break，让graph正常跑完收尾，tracing中记录为正常结束
+        thread_output = None
         async for event in graph.astream(input_data, config):
-            # 保存最后的结果
-            if event:
-                final_result = event
+            if event and 'generate_tweet_thread' in event:
+                thread_output = event['generate_tweet_thread']
                 
         # 返回最终结果
-        if final_result and 'generate_tweet_thread' in final_result:
+        if thread_output:
             return {
                 "status": "success",
-                "data": final_result['generate_tweet_thread']
+                "data": thread_output
             }
         else:
             return {"status": "error", "error": "No result generated"}
@@ -76,6 +116,28 @@ async def generate_thread_async(topic: str, language: str, config: Dict[str, Any
         return {"status": "error", "error": str(e)}
 
 
+def run_generation_in_background(topic: str, language: str, config: Dict[str, Any], placeholder) -> Dict[str, Any]:
+    """在后台事件循环中生成thread，渲染线程定期轮询并刷新已用时间
+    
+    每次轮询都会更新placeholder：Streamlit只在st.*调用处响应停止或重跑，
+    此时脚本在这里中断，finally中取消后台任务
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        generate_thread_async(topic, language, config),
+        _get_loop()
+    )
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except concurrent.futures.TimeoutError:
+                placeholder.caption(f"⏳ 已用时 {time.monotonic() - start:.0f} 秒")
+    finally:
+        future.cancel()
+        placeholder.empty()
+
+
 def get_default_config(model: str = "gpt-4o-mini") -> Dict[str, Any]:
     """获取默认配置"""
     return {
@@ -86,6 +148,43 @@ def get_default_config(model: str = "gpt-4o-mini") -> Dict[str, Any]:
     }
 
 
+@st.fragment
+def render_sidebar_config():
+    """渲染侧边栏配置
+    
+    作为fragment运行：切换模型或语言时只重跑本函数，而不是整页rerun。
+    选择结果通过widget key保存在session state中，供生成按钮读取
+    """
+    st.header("⚙️ 配置")
+    
+    # 模型选择
+    selected_model = st.selectbox(
+        "选择模型:",
+        AVAILABLE_MODELS,
+        index=0,
+        key="selected_model",
+        help="选择用于生成Twitter thread的模型"
+    )
+    
+    # 语言选择
+    selected_language_display = st.selectbox(
+        "选择生成语言:",
+        LANGUAGE_OPTIONS,
+        index=0,  # 默认选择中文
+        key="selected_language_option",
+        help="选择生成Twitter thread的语言"
+    )
+    
+    # 从显示文本中提取语言代码
+    selected_language = LANGUAGE_CODE_BY_OPTION[selected_language_display]
+    
+    st.markdown("---")
+    st.markdown("**当前配置:**")
+    st.markdown(f"- 🤖 模型: {selected_model}")
+    st.markdown(f"- 🌍 语言: {selected_language}")
+    st.markdown("- 🔧 Provider: OpenAI")
+
+
 def main():
     """主函数：构建Streamlit界面"""
     st.set_page_config(
@@ -98,47 +197,20 @@ def main():
     st.markdown("快速生成高质量的Twitter thread")
     st.markdown("---")
     
-    # 初始化session state
-    if 'generated_threads' not in st.session_state:
-        st.session_state.generated_threads = []
-    if 'current_result' not in st.session_state:
-        st.session_state.current_result = None
+    # 初始化session state（已存在的键保持不变）
+    for key, default in {
+        "generated_threads": deque(maxlen=MAX_HISTORY),
+        "current_result": None,
+    }.items():
+        st.session_state.setdefault(key, default)
     
-    # 左侧边栏：模型配置
+    # 左侧边栏：模型配置（fragment内的交互只重跑侧边栏，不会重新渲染整页结果）
     with st.sidebar:
-        st.header("⚙️ 配置")
-        
-        # 模型选择
-        available_models = ["gpt-4.1","gpt-4.1-mini","gpt-4o-mini", "gpt-4o"]
-        selected_model = st.selectbox(
-            "选择模型:",
-            available_models,
-            index=0,
-            help="选择用于生成Twitter thread的模型"
-        )
-        
-        # 语言选择
-        available_languages = [
-            ("英文", "English"),
-            ("中文", "Chinese")
-        ]
-        
-        language_options = [f"{name} ({code})" for name, code in available_languages]
-        selected_language_display = st.selectbox(
-            "选择生成语言:",
-            language_options,
-            index=0,  # 默认选择中文
-            help="选择生成Twitter thread的语言"
-        )
-        
-        # 从显示文本中提取语言代码
-        selected_language = available_languages[language_options.index(selected_language_display)][1]
-        
-        st.markdown("---")
-        st.markdown("**当前配置:**")
-        st.markdown(f"- 🤖 模型: {selected_model}")
-        st.markdown(f"- 🌍 语言: {selected_language}")
-        st.markdown("- 🔧 Provider: OpenAI")
+        render_sidebar_config()
+    
+    # 生成时从session state读取侧边栏的当前选择
+    selected_model = st.session_state.selected_model
+    selected_language = LANGUAGE_CODE_BY_OPTION[st.session_state.selected_language_option]
     
     # 主界面
     col1, col2 = st.columns([1, 1])
@@ -157,26 +229,31 @@ def main():
         # 生成按钮
         if st.button("🚀 生成Thread", type="primary", use_container_width=True):
             if topic.strip():
-                # 显示加载状态
-                with st.spinner(f"正在用{selected_language}生成Twitter thread..."):
+                # 在状态组件中原地展示进度，生成完成后无需整页rerun：
+                # 结果区和历史记录在本次脚本执行的后续部分才渲染，会直接读取新的session state
+                with st.status(f"正在用{selected_language}生成Twitter thread...", expanded=True) as status:
                     # 获取配置
                     config = get_default_config(selected_model)
                     
-                    # 调用异步函数生成thread，现在传递language参数
-                    result = safe_asyncio_run(generate_thread_async(topic, selected_language, config))
+                    # 在后台任务中生成thread，渲染线程轮询并显示已用时间
+                    progress_placeholder = st.empty()
+                    result = run_generation_in_background(topic, selected_language, config, progress_placeholder)
                     
                     if result["status"] == "success":
                         st.session_state.current_result = result["data"]
                         # 保存到历史记录，包含language信息
                         st.session_state.generated_threads.append({
+                            "id": uuid.uuid4().hex[:12],  # 稳定的记录ID，用作widget key
                             "topic": topic,
                             "language": selected_language,
                             "result": result["data"]
                         })
-                        st.success("✅ Twitter thread生成成功！")
-                        st.rerun()
+                        status.update(label="✅ Twitter thread生成成功！", state="complete", expanded=False)
                     else:
-                        st.error(f"❌ 生成失败: {result.get('error', '未知错误')}")
+                        status.update(label="❌ 生成失败", state="error", expanded=False)
+                
+                if result["status"] != "success":
+                    st.error(f"❌ 生成失败: {result.get('error', '未知错误')}")
             else:
                 st.warning("请输入一个主题")
     
@@ -204,40 +281,24 @@ def main():
                 if 'outline' in result:
                     outline = result['outline']
                     
-                    # 收集所有tweets以便计算总数
-                    all_tweets = []
-                    for node in outline.nodes:
-                        for leaf_node in node.leaf_nodes:
-                            all_tweets.append(leaf_node)
-                    
-                    total_tweets = len(all_tweets)
+                    # 一次性展平所有叶子节点，后续渲染直接遍历扁平列表
+                    all_leaves = outline.all_leaf_nodes()
+                    total_tweets = len(all_leaves)
                     
                     # 遍历并显示每个tweet
-                    tweet_index = 0
-                    for node in outline.nodes:
-                        for leaf_node in node.leaf_nodes:
-                            tweet_index += 1
+                    for tweet_index, leaf_node in enumerate(all_leaves, 1):
+                        # 为每条推文创建一个卡片样式的容器
+                        with st.container(border=True):
+                            # 显示tweet编号和内容
+                            st.markdown(f"**({tweet_index}/{total_tweets})**")
+                            
+                            # 推文内容只渲染一次：纯文本代码块（不做语法高亮）自带复制按钮，
+                            # 同时保留原始换行和emoji，所见即所发
+                            st.code(leaf_node.tweet_content, language=None, wrap_lines=True)
                             
-                            # 为每条推文创建一个卡片样式的容器
-                            with st.container(border=True):
-                                # 显示tweet编号和内容
-                                st.markdown(f"**({tweet_index}/{total_tweets})**")
-                                
-                                # 处理换行符，确保在Streamlit中正确显示，同时保持emoji等格式
-                                formatted_content = leaf_node.tweet_content.replace('\n', '  \n')
-                                st.markdown(formatted_content)
-                                
-                                # 显示字符数（支持中文字符计数）
-                                char_count = count_twitter_chars(leaf_node.tweet_content)
-                                if char_count > 280:
-                                    st.caption(f"⚠️ 字符数: {char_count}/280 (超出限制)")
-                                else:
-                                    st.caption(f"✅ 字符数: {char_count}/280")
-                                
-                                # 添加复制区域
-                                st.markdown("**📋 复制到Twitter:**")
-                                st.code(leaf_node.tweet_content, language="text")
-                                st.caption("💡 点击代码框右上角的复制按钮，然后直接粘贴到Twitter")
+                            # 显示字符数（支持中文字符计数）
+                            st.caption(char_count_caption(leaf_node.tweet_content))
+                            st.caption("💡 点击内容框右上角的复制按钮，然后直接粘贴到Twitter")
                 else:
                     st.info("暂无Twitter thread内容")
             
@@ -259,19 +320,8 @@ def main():
             with col_download2:
                 # 下载Twitter thread
                 if 'outline' in result:
-                    # 动态生成thread内容用于下载
-                    outline = result['outline']
-                    all_tweets = []
-                    for node in outline.nodes:
-                        for leaf_node in node.leaf_nodes:
-                            all_tweets.append(leaf_node)
-                    
-                    total_tweets = len(all_tweets)
-                    thread_content = []
-                    for i, leaf_node in enumerate(all_tweets, 1):
-                        thread_content.append(f"({i}/{total_tweets}) {leaf_node.tweet_content}")
-                    
-                    download_content = "\n\n".join(thread_content)
+                    # 优先复用graph节点已生成的thread文本，避免每次rerun重新拼接
+                    download_content = result.get('tweet_thread') or result['outline'].display_tweet_thread()
                     
                     st.download_button(
                         label="📥 下载Thread",
@@ -287,9 +337,10 @@ def main():
     if st.session_state.generated_threads:
         st.markdown("---")
         st.subheader("📜 历史记录")
+        st.caption(f"仅保留最近{MAX_HISTORY}条记录")
         
-        # 显示最近的3个生成记录
-        recent_threads = st.session_state.generated_threads[-3:]
+        # 显示最近的3个生成记录（deque不支持切片，先转为list）
+        recent_threads = list(st.session_state.generated_threads)[-3:]
         cols = st.columns(3)
         
         for i, thread_data in enumerate(reversed(recent_threads)):
@@ -299,7 +350,8 @@ def main():
                     # 显示语言信息（如果存在）
                     if 'language' in thread_data:
                         st.markdown(f"**语言：** {thread_data['language']}")
-                    if st.button("查看", key=f"view_{len(st.session_state.generated_threads)-i-1}"):
+                    # 按记录ID生成key，新记录加入时已有按钮的widget身份保持不变
+                    if st.button("查看", key=f"view_{thread_data.get('id', id(thread_data))}"):
                         st.session_state.current_result = thread_data['result']
                         st.rerun()
     
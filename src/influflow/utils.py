@@ -2,19 +2,17 @@ import os
 import asyncio
 import json
 import datetime
-import requests
 import random 
-import concurrent
-import hashlib
+import concurrent.futures
+import threading
 import aiohttp
 import httpx
-import time
 from typing import List, Optional, Dict, Any, Union, Literal, Annotated, cast, Tuple
-from urllib.parse import unquote
+from urllib.parse import urlparse, parse_qs, urlsplit, urlunsplit, parse_qsl, urlencode
 from collections import defaultdict
-import itertools
+from functools import lru_cache
 import re
-import copy
+import traceback
 
 from exa_py import Exa
 from linkup import LinkupClient
@@ -22,13 +20,14 @@ from tavily import AsyncTavilyClient
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.aio import SearchClient as AsyncAzureAISearchClient
 from duckduckgo_search import DDGS 
-from bs4 import BeautifulSoup
-from markdownify import markdownify
+from bs4 import BeautifulSoup, SoupStrainer
+from markdownify import MarkdownConverter
 from pydantic import BaseModel
 from langchain.chat_models import init_chat_model
-from langchain.embeddings import init_embeddings
+from langchain.embeddings import CacheBackedEmbeddings, init_embeddings
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
+from langchain_core.stores import InMemoryByteStore
 from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models import BaseChatModel
 from langchain_core.runnables import RunnableConfig
@@ -43,6 +42,166 @@ from influflow.configuration import WorkflowConfiguration
 from influflow.state import OutlineNode
 
 
+# Separators shared by the search result formatters
+SECTION_SEPARATOR = "=" * 80 + "\n"
+SUBSECTION_SEPARATOR = "-" * 80 + "\n"
+SOURCE_END_SEPARATOR = "\n\n" + SUBSECTION_SEPARATOR
+
+# Only the result blocks of a Google results page are needed, so skip building the rest of the tree
+_GOOGLE_RESULT_STRAINER = SoupStrainer("div", class_="ezO2md")
+
+# Print full tracebacks for failed search queries (set INFLUFLOW_DEBUG=1 to enable)
+DEBUG_TRACEBACKS = os.environ.get("INFLUFLOW_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Pages shorter than this are passed through as-is instead of being summarized by the LLM
+MIN_CHARS_TO_SUMMARIZE = 2000
+
+# Maximum number of in-flight requests per search batch
+MAX_CONCURRENT_SEARCHES = 8
+
+# Dedicated, bounded pool for blocking search SDK calls, kept apart from the default executor
+_SEARCH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+
+# Maximum number of body bytes read from a fetched page; downstream formatting truncates far below this
+MAX_BODY_BYTES = 512 * 1024
+
+# Content types whose bodies are never downloaded or parsed as text
+_BINARY_MIME_PREFIXES = (
+    'application/pdf', 'application/octet-stream', 'application/zip',
+    'image/', 'video/', 'audio/', 'font/',
+)
+
+# Pool for CPU-bound HTML parsing, so large pages don't stall the event loop
+_PARSE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=min(8, (os.cpu_count() or 1) * 2), thread_name_prefix="parse"
+)
+
+# HTML-to-markdown converter with default options, built once and reused for every scraped page
+_MARKDOWN_CONVERTER = MarkdownConverter()
+
+# Embedding model used to rerank search results, and the memory budget for chunk embeddings kept across runs.
+# Each cached chunk is a 1536-dim vector serialized as JSON, roughly 30 KB. A default run reranks about
+# 15 pages (3 queries x 5 results) of tens of 1500-char chunks each, i.e. a few hundred chunks or ~10-15 MB,
+# so 64 MB keeps the chunks of the last few runs
+RERANK_EMBEDDING_MODEL = "openai:text-embedding-3-small"
+MAX_CACHED_EMBEDDING_BYTES = 64 * 1024 * 1024
+
+# Search API clients, created lazily on first use and shared across calls
+_tavily_client: Optional[AsyncTavilyClient] = None
+_exa_client: Optional[Exa] = None
+
+# Rerank embeddings, one per event loop since the OpenAI client is bound to the loop it first ran on,
+# all backed by the same cache, see get_rerank_embeddings()
+_rerank_embeddings: Dict[asyncio.AbstractEventLoop, CacheBackedEmbeddings] = {}
+
+# Shared HTTP sessions for page fetches, one per event loop, see get_http_session()
+_http_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_tavily_client() -> AsyncTavilyClient:
+    """Return the shared AsyncTavilyClient, creating it on first use."""
+    global _tavily_client
+    if _tavily_client is None:
+        _tavily_client = AsyncTavilyClient()
+    return _tavily_client
+
+
+def get_exa_client() -> Exa:
+    """Return the shared Exa client, creating it on first use."""
+    global _exa_client
+    if _exa_client is None:
+        # API key should be configured in your .env file
+        _exa_client = Exa(api_key = f"{os.getenv('EXA_API_KEY')}")
+    return _exa_client
+
+
+class _BoundedByteStore(InMemoryByteStore):
+    """In-memory byte store that evicts its oldest entries once the stored values exceed max_bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # Shared by the embeddings of every event loop, which may run on different threads
+        self._lock = threading.Lock()
+
+    def mset(self, key_value_pairs) -> None:
+        with self._lock:
+            for key, value in key_value_pairs:
+                old = self.store.pop(key, None)
+                if old is not None:
+                    self.total_bytes -= len(old)
+                self.store[key] = value
+                self.total_bytes += len(value)
+            while self.total_bytes > self.max_bytes and self.store:
+                self.total_bytes -= len(self.store.pop(next(iter(self.store))))
+
+    async def amset(self, key_value_pairs) -> None:
+        self.mset(key_value_pairs)
+
+    def mdelete(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                old = self.store.pop(key, None)
+                if old is not None:
+                    self.total_bytes -= len(old)
+
+    async def amdelete(self, keys) -> None:
+        self.mdelete(keys)
+
+
+# Chunk embeddings cached by content, shared across event loops and workflow runs
+_RERANK_EMBEDDING_CACHE = _BoundedByteStore(MAX_CACHED_EMBEDDING_BYTES)
+
+
+def get_rerank_embeddings() -> CacheBackedEmbeddings:
+    """Return the rerank embeddings for the running event loop, creating them on first use.
+
+    Chunk embeddings are cached by content, so pages that come back across queries
+    or workflow runs are not embedded again. The cache is shared, while the embedding
+    client is created per loop like get_http_session().
+    """
+    loop = asyncio.get_running_loop()
+    embeddings = _rerank_embeddings.get(loop)
+    if embeddings is None:
+        # Drop embeddings of loops that have since been closed
+        for stale_loop in [l for l in _rerank_embeddings if l.is_closed()]:
+            del _rerank_embeddings[stale_loop]
+        embeddings = _rerank_embeddings[loop] = CacheBackedEmbeddings.from_bytes_store(
+            init_embeddings(RERANK_EMBEDDING_MODEL),
+            _RERANK_EMBEDDING_CACHE,
+            namespace=RERANK_EMBEDDING_MODEL,
+            key_encoder="blake2b",
+        )
+    return embeddings
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session for the running event loop, creating it on first use.
+
+    Sessions are bound to the loop they were created on, so each loop gets its own
+    and keeps it until close_http_session() is awaited on that loop.
+    """
+    loop = asyncio.get_running_loop()
+    session = _http_sessions.get(loop)
+    if session is None or session.closed:
+        # Drop sessions of loops that have since been closed; they can no longer be closed on their loop
+        for stale_loop in [l for l in _http_sessions if l.is_closed()]:
+            del _http_sessions[stale_loop]
+        session = _http_sessions[loop] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, keepalive_timeout=30, ttl_dns_cache=300),
+            cookie_jar=aiohttp.DummyCookieJar(),  # Don't carry cookies between unrelated fetches
+        )
+    return session
+
+
+async def close_http_session() -> None:
+    """Close the running loop's shared aiohttp session, if one is open. Call this on loop shutdown."""
+    session = _http_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
 def get_config_value(value):
     """
     Helper function to handle string, dict, and enum cases of configuration values
@@ -55,6 +214,83 @@ def get_config_value(value):
         return value.value
 
 
+def _failed_search_response(query: str, error: Exception) -> dict:
+    """Build a placeholder search response for a query that raised, keeping index alignment."""
+    print(f"Error processing query '{query}': {str(error)}")
+    return {
+        "query": query,
+        "follow_up_questions": None,
+        "answer": None,
+        "images": [],
+        "results": [],
+        "error": str(error)
+    }
+
+
+def _replace_failed_searches(search_queries, search_docs) -> list[dict]:
+    """Swap exceptions returned by asyncio.gather(..., return_exceptions=True) for placeholder responses."""
+    return [
+        _failed_search_response(query, doc) if isinstance(doc, Exception) else doc
+        for query, doc in zip(search_queries, search_docs)
+    ]
+
+
+# Query parameters that only track the referrer and never change the page content
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid"})
+
+
+def _normalize_url(url: str) -> str:
+    """Normalize a URL for duplicate detection.
+
+    Lowercases the scheme and host, drops the fragment and strips tracking
+    parameters (utm_*, fbclid, gclid, ...) so that links to the same page compare equal.
+    """
+    parts = urlsplit(url)
+    query = parts.query
+    if query:
+        query = urlencode([
+            (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+            if not key.startswith("utm_") and key not in _TRACKING_PARAMS
+        ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+async def _read_capped_text(response: aiohttp.ClientResponse, max_bytes: int = MAX_BODY_BYTES) -> str:
+    """Read at most max_bytes of a response body and decode it, replacing undecodable bytes."""
+    buf = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        buf.extend(chunk)
+        if len(buf) >= max_bytes:
+            del buf[max_bytes:]
+            break
+    try:
+        return buf.decode(response.charset or 'utf-8', errors='replace')
+    except LookupError:  # Unknown charset declared by the server
+        return buf.decode('utf-8', errors='replace')
+
+
+def _html_to_text(html: str) -> str:
+    """Extract the visible text of an HTML page."""
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+async def _gather_staggered(search_fn, search_queries, interval: float) -> list:
+    """Run search_fn for every query concurrently, spacing start times by interval seconds.
+
+    Keeps the request start rate within an API's published budget without waiting for
+    earlier requests to finish. Exceptions are returned in place of results.
+    """
+    async def run(i, query):
+        if i > 0:  # Don't delay the first request
+            await asyncio.sleep(i * interval)
+        return await search_fn(query)
+
+    return await asyncio.gather(
+        *(run(i, query) for i, query in enumerate(search_queries)),
+        return_exceptions=True
+    )
+
+
 def deduplicate_and_format_sources(
     search_response,
     max_tokens_per_source=5000,
@@ -96,14 +332,14 @@ def deduplicate_and_format_sources(
     else:
         raise ValueError(f"Invalid deduplication strategy: {deduplication_strategy}")
 
-    # Format output
-    formatted_text = "Content from sources:\n"
+    # Format output (accumulate parts and join once to avoid quadratic string concatenation)
+    parts = ["Content from sources:\n"]
     for i, source in enumerate(unique_sources.values(), 1):
-        formatted_text += f"{'='*80}\n"  # Clear section separator
-        formatted_text += f"Source: {source['title']}\n"
-        formatted_text += f"{'-'*80}\n"  # Subsection separator
-        formatted_text += f"URL: {source['url']}\n===\n"
-        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+        parts.append(SECTION_SEPARATOR)  # Clear section separator
+        parts.append(f"Source: {source['title']}\n")
+        parts.append(SUBSECTION_SEPARATOR)  # Subsection separator
+        parts.append(f"URL: {source['url']}\n===\n")
+        parts.append(f"Most relevant content from source: {source['content']}\n===\n")
         if include_raw_content:
             # Using rough estimate of 4 characters per token
             char_limit = max_tokens_per_source * 4
@@ -112,12 +348,18 @@ def deduplicate_and_format_sources(
             if raw_content is None:
                 raw_content = ''
                 print(f"Warning: No raw_content found for source {source['url']}")
+            parts.append(f"Full source content limited to {max_tokens_per_source} tokens: ")
             if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-        formatted_text += f"{'='*80}\n\n" # End section separator
+                # Slice once straight into the output parts, no intermediate concatenation
+                parts.append(raw_content[:char_limit])
+                parts.append("... [truncated]\n\n")
+            else:
+                parts.append(raw_content)
+                parts.append("\n\n")
+        parts.append(SECTION_SEPARATOR)  # End section separator
+        parts.append("\n")
                 
-    return formatted_text.strip()
+    return "".join(parts).strip()
 
 @traceable
 async def tavily_search_async(search_queries, max_results: int = 5, topic: Literal["general", "news", "finance"] = "general", include_raw_content: bool = True):
@@ -149,21 +391,25 @@ async def tavily_search_async(search_queries, max_results: int = 5, topic: Liter
                     ]
                 }
     """
-    tavily_async_client = AsyncTavilyClient()
-    search_tasks = []
-    for query in search_queries:
-            search_tasks.append(
-                tavily_async_client.search(
-                    query,
-                    max_results=max_results,
-                    include_raw_content=include_raw_content,
-                    topic=topic
-                )
+    tavily_async_client = get_tavily_client()
+    # Bound concurrency so large query batches don't trip the API rate limit
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+
+    async def search_single_query(query):
+        async with semaphore:
+            return await tavily_async_client.search(
+                query,
+                max_results=max_results,
+                include_raw_content=include_raw_content,
+                topic=topic
             )
 
-    # Execute all searches concurrently
-    search_docs = await asyncio.gather(*search_tasks)
-    return search_docs
+    # Execute all searches concurrently; a failed query doesn't cancel the others
+    search_docs = await asyncio.gather(
+        *(search_single_query(query) for query in search_queries),
+        return_exceptions=True
+    )
+    return _replace_failed_searches(search_queries, search_docs)
 
 @traceable
 async def azureaisearch_search_async(search_queries: list[str], max_results: int = 5, topic: str = "general", include_raw_content: bool = True) -> list[dict]:
@@ -220,14 +466,23 @@ async def azureaisearch_search_async(search_queries: list[str], max_results: int
             ]
             return {"query": query, "results": results}
 
-        # parallelize the search queries
-        tasks = [do_search(q) for q in search_queries]
-        return await asyncio.gather(*tasks)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+
+        async def bounded_search(query: str) -> dict:
+            async with semaphore:
+                return await do_search(query)
+
+        # parallelize the search queries; a failed query doesn't cancel the others
+        results = await asyncio.gather(
+            *(bounded_search(q) for q in search_queries),
+            return_exceptions=True
+        )
+        return _replace_failed_searches(search_queries, results)
 
 
 @traceable
-def perplexity_search(search_queries):
-    """Search the web using the Perplexity API.
+async def perplexity_search_async(search_queries):
+    """Search the web using the Perplexity API, issuing all queries concurrently.
     
     Args:
         search_queries (List[SearchQuery]): List of search queries to process
@@ -257,10 +512,8 @@ def perplexity_search(search_queries):
         "content-type": "application/json",
         "Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}"
     }
-    
-    search_docs = []
-    for query in search_queries:
 
+    async def search_single_query(client: httpx.AsyncClient, query: str) -> dict:
         payload = {
             "model": "sonar-pro",
             "messages": [
@@ -275,7 +528,7 @@ def perplexity_search(search_queries):
             ]
         }
         
-        response = requests.post(
+        response = await client.post(
             "https://api.perplexity.ai/chat/completions",
             headers=headers,
             json=payload
@@ -310,15 +563,18 @@ def perplexity_search(search_queries):
             })
         
         # Format response to match Tavily structure
-        search_docs.append({
+        return {
             "query": query,
             "follow_up_questions": None,
             "answer": None,
             "images": [],
             "results": results
-        })
-    
-    return search_docs
+        }
+
+    # One client for the whole batch so requests share the connection pool
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        return await asyncio.gather(*(search_single_query(client, query) for query in search_queries))
+
 
 @traceable
 async def exa_search(search_queries, max_characters: Optional[int] = None, num_results=5, 
@@ -361,13 +617,13 @@ async def exa_search(search_queries, max_characters: Optional[int] = None, num_r
     if include_domains and exclude_domains:
         raise ValueError("Cannot specify both include_domains and exclude_domains")
     
-    # Initialize Exa client (API key should be configured in your .env file)
-    exa = Exa(api_key = f"{os.getenv('EXA_API_KEY')}")
+    # Reuse the shared Exa client
+    exa = get_exa_client()
     
     # Define the function to process a single query
     async def process_query(query):
         # Use run_in_executor to make the synchronous exa call in a non-blocking way
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
         # Define the function for the executor with all parameters
         def exa_search_fn():
@@ -390,100 +646,70 @@ async def exa_search(search_queries, max_characters: Optional[int] = None, num_r
                 
             return exa.search_and_contents(query, **kwargs)
         
-        response = await loop.run_in_executor(None, exa_search_fn)
+        response = await loop.run_in_executor(_SEARCH_EXECUTOR, exa_search_fn)
         
         # Format the response to match the expected output structure
         formatted_results = []
-        seen_urls = set()  # Track URLs to avoid duplicates
+        seen_urls = set()  # Track normalized URLs to avoid duplicates
         
         # Helper function to safely get value regardless of if item is dict or object
         def get_value(item, key, default=None):
             if isinstance(item, dict):
                 return item.get(key, default)
-            else:
-                return getattr(item, key, default) if hasattr(item, key) else default
+            return getattr(item, key, default)
         
-        # Access the results from the SearchResponse object
-        results_list = get_value(response, 'results', [])
+        # The SDK returns one item type per response, so pick the accessor once per list
+        def getter_for(items):
+            return dict.get if items and isinstance(items[0], dict) else getattr
         
-        # First process all main results
-        for result in results_list:
-            # Get the score with a default of 0.0 if it's None or not present
-            score = get_value(result, 'score', 0.0)
-            
-            # Combine summary and text for content if both are available
-            text_content = get_value(result, 'text', '')
-            summary_content = get_value(result, 'summary', '')
-            
-            content = text_content
-            if summary_content:
-                if content:
-                    content = f"{summary_content}\n\n{content}"
-                else:
-                    content = summary_content
-            
-            title = get_value(result, 'title', '')
-            url = get_value(result, 'url', '')
-            
-            # Skip if we've seen this URL before (removes duplicate entries)
-            if url in seen_urls:
-                continue
-                
-            seen_urls.add(url)
+        # Format a main result or subpage, or return None if its URL was already seen
+        def build_entry(item, get):
+            url = get(item, 'url', '')
+            normalized_url = _normalize_url(url)
+            if normalized_url in seen_urls:
+                return None
+            seen_urls.add(normalized_url)
             
-            # Main result entry
-            result_entry = {
-                "title": title,
+            # Combine summary and text for content, skipping whichever is empty
+            text_content = get(item, 'text', '')
+            summary_content = get(item, 'summary', '')
+            return {
+                "title": get(item, 'title', ''),
                 "url": url,
-                "content": content,
-                "score": score,
+                "content": "\n\n".join(part for part in (summary_content, text_content) if part),
+                "score": get(item, 'score', 0.0),
                 "raw_content": text_content
             }
-            
-            # Add the main result to the formatted results
-            formatted_results.append(result_entry)
         
-        # Now process subpages only if the subpages parameter was provided
-        if subpages is not None:
-            for result in results_list:
-                subpages_list = get_value(result, 'subpages', [])
-                for subpage in subpages_list:
-                    # Get subpage score
-                    subpage_score = get_value(subpage, 'score', 0.0)
-                    
-                    # Combine summary and text for subpage content
-                    subpage_text = get_value(subpage, 'text', '')
-                    subpage_summary = get_value(subpage, 'summary', '')
-                    
-                    subpage_content = subpage_text
-                    if subpage_summary:
-                        if subpage_content:
-                            subpage_content = f"{subpage_summary}\n\n{subpage_content}"
-                        else:
-                            subpage_content = subpage_summary
-                    
-                    subpage_url = get_value(subpage, 'url', '')
-                    
-                    # Skip if we've seen this URL before
-                    if subpage_url in seen_urls:
-                        continue
-                        
-                    seen_urls.add(subpage_url)
-                    
-                    formatted_results.append({
-                        "title": get_value(subpage, 'title', ''),
-                        "url": subpage_url,
-                        "content": subpage_content,
-                        "score": subpage_score,
-                        "raw_content": subpage_text
-                    })
+        # Access the results from the SearchResponse object
+        results_list = get_value(response, 'results', [])
         
-        # Collect images if available (only from main results to avoid duplication)
+        # Single pass over results_list: main entry, pending subpages, image
+        subpage_candidates = []  # Deduplicated after the pass so main results keep URL priority
         images = []
+        seen_images = set()  # Track images for O(1) duplicate checks, list keeps order
+        get_result = getter_for(results_list)
         for result in results_list:
-            image = get_value(result, 'image')
-            if image and image not in images:  # Avoid duplicate images
+            entry = build_entry(result, get_result)
+            if entry is not None:
+                formatted_results.append(entry)
+            
+            # Collect subpages only if the subpages parameter was provided
+            if subpages is not None:
+                subpage_candidates.extend(get_result(result, 'subpages', []))
+            
+            # Collect images only from main results to avoid duplication
+            image = get_result(result, 'image')
+            if image and image not in seen_images:  # Avoid duplicate images
+                seen_images.add(image)
                 images.append(image)
+        
+        # Subpage entries follow all main results, as before
+        get_subpage = getter_for(subpage_candidates)
+        for subpage in subpage_candidates:
+            entry = build_entry(subpage, get_subpage)
+            if entry is not None:
+                formatted_results.append(entry)
                 
         return {
             "query": query,
@@ -493,35 +719,28 @@ async def exa_search(search_queries, max_characters: Optional[int] = None, num_r
             "results": formatted_results
         }
     
-    # Process all queries sequentially with delay to respect rate limit
-    search_docs = []
-    for i, query in enumerate(search_queries):
-        try:
-            # Add delay between requests (0.25s = 4 requests per second, well within the 5/s limit)
-            if i > 0:  # Don't delay the first request
-                await asyncio.sleep(0.25)
-            
-            result = await process_query(query)
-            search_docs.append(result)
-        except Exception as e:
-            # Handle exceptions gracefully
-            print(f"Error processing query '{query}': {str(e)}")
-            # Add a placeholder result for failed queries to maintain index alignment
-            search_docs.append({
-                "query": query,
-                "follow_up_questions": None,
-                "answer": None,
-                "images": [],
-                "results": [],
-                "error": str(e)
-            })
-            
-            # Add additional delay if we hit a rate limit error
-            if "429" in str(e):
-                print("Rate limit exceeded. Adding additional delay...")
-                await asyncio.sleep(1.0)  # Add a longer delay if we hit a rate limit
-    
-    return search_docs
+    # Process all queries concurrently, starting one every 0.25s (4 requests per second, within the 5/s limit)
+    search_docs = await _gather_staggered(process_query, search_queries, interval=0.25)
+    return _replace_failed_searches(search_queries, search_docs)
+
+
+def _format_arxiv_published(published) -> str:
+    return published.isoformat() if hasattr(published, 'isoformat') else str(published)
+
+
+# arXiv metadata fields rendered into the result content, in display order:
+# (metadata key, label, formatter)
+_ARXIV_FIELDS = (
+    ("Summary", "Summary", str),
+    ("Authors", "Authors", str),
+    ("Published", "Published", _format_arxiv_published),
+    ("primary_category", "Primary Category", str),
+    ("categories", "Categories", ", ".join),
+    ("comment", "Comment", str),
+    ("journal_ref", "Journal Reference", str),
+    ("doi", "DOI", str),
+)
+
 
 @traceable
 async def arxiv_search_async(search_queries, load_max_docs=5, get_full_documents=True, load_all_available_meta=True):
@@ -554,18 +773,18 @@ async def arxiv_search_async(search_queries, load_max_docs=5, get_full_documents
             }
     """
     
+    # Retriever settings are the same for every query, so share one instance
+    retriever = ArxivRetriever(
+        load_max_docs=load_max_docs,
+        get_full_documents=get_full_documents,
+        load_all_available_meta=load_all_available_meta
+    )
+    
     async def process_single_query(query):
         try:
-            # Create retriever for each query
-            retriever = ArxivRetriever(
-                load_max_docs=load_max_docs,
-                get_full_documents=get_full_documents,
-                load_all_available_meta=load_all_available_meta
-            )
-            
             # Run the synchronous retriever in a thread pool
-            loop = asyncio.get_event_loop()
-            docs = await loop.run_in_executor(None, lambda: retriever.invoke(query))
+            loop = asyncio.get_running_loop()
+            docs = await loop.run_in_executor(_SEARCH_EXECUTOR, retriever.invoke, query)
             
             results = []
             # Assign decreasing scores based on the order
@@ -580,45 +799,16 @@ async def arxiv_search_async(search_queries, load_max_docs=5, get_full_documents
                 url = metadata.get('entry_id', '')
                 
                 # Format content with all useful metadata
-                content_parts = []
-
-                # Primary information
-                if 'Summary' in metadata:
-                    content_parts.append(f"Summary: {metadata['Summary']}")
-
-                if 'Authors' in metadata:
-                    content_parts.append(f"Authors: {metadata['Authors']}")
-
-                # Add publication information
-                published = metadata.get('Published')
-                published_str = published.isoformat() if hasattr(published, 'isoformat') else str(published) if published else ''
-                if published_str:
-                    content_parts.append(f"Published: {published_str}")
-
-                # Add additional metadata if available
-                if 'primary_category' in metadata:
-                    content_parts.append(f"Primary Category: {metadata['primary_category']}")
-
-                if 'categories' in metadata and metadata['categories']:
-                    content_parts.append(f"Categories: {', '.join(metadata['categories'])}")
-
-                if 'comment' in metadata and metadata['comment']:
-                    content_parts.append(f"Comment: {metadata['comment']}")
-
-                if 'journal_ref' in metadata and metadata['journal_ref']:
-                    content_parts.append(f"Journal Reference: {metadata['journal_ref']}")
-
-                if 'doi' in metadata and metadata['doi']:
-                    content_parts.append(f"DOI: {metadata['doi']}")
+                content_parts = [
+                    f"{label}: {fmt(value)}"
+                    for key, label, fmt in _ARXIV_FIELDS
+                    if (value := metadata.get(key))
+                ]
 
                 # Get PDF link if available in the links
-                pdf_link = ""
-                if 'links' in metadata and metadata['links']:
-                    for link in metadata['links']:
-                        if 'pdf' in link:
-                            pdf_link = link
-                            content_parts.append(f"PDF: {pdf_link}")
-                            break
+                pdf_link = next((link for link in metadata.get('links') or () if 'pdf' in link), None)
+                if pdf_link:
+                    content_parts.append(f"PDF: {pdf_link}")
 
                 # Join all content parts with newlines 
                 content = "\n".join(content_parts)
@@ -651,32 +841,24 @@ async def arxiv_search_async(search_queries, load_max_docs=5, get_full_documents
                 'error': str(e)
             }
     
-    # Process queries sequentially with delay to respect arXiv rate limit (1 request per 3 seconds)
+    # Process queries one at a time: arXiv asks for a single connection and at most one request
+    # every 3 seconds, and with get_full_documents each query also downloads its PDFs
     search_docs = []
+    delay = 3.0
     for i, query in enumerate(search_queries):
-        try:
-            # Add delay between requests (3 seconds per ArXiv's rate limit)
-            if i > 0:  # Don't delay the first request
-                await asyncio.sleep(3.0)
-            
-            result = await process_single_query(query)
-            search_docs.append(result)
-        except Exception as e:
-            # Handle exceptions gracefully
-            print(f"Error processing arXiv query '{query}': {str(e)}")
-            search_docs.append({
-                'query': query,
-                'follow_up_questions': None,
-                'answer': None,
-                'images': [],
-                'results': [],
-                'error': str(e)
-            })
-            
-            # Add additional delay if we hit a rate limit error
-            if "429" in str(e) or "Too Many Requests" in str(e):
-                print("ArXiv rate limit exceeded. Adding additional delay...")
-                await asyncio.sleep(5.0)  # Add a longer delay if we hit a rate limit
+        if i > 0:  # Don't delay the first request
+            await asyncio.sleep(delay)
+        
+        result = await process_single_query(query)
+        search_docs.append(result)
+        
+        # Add additional delay before the next query if we hit a rate limit error
+        error = result.get('error', '')
+        if "429" in error or "Too Many Requests" in error:
+            print("ArXiv rate limit exceeded. Adding additional delay...")
+            delay = 3.0 + 5.0
+        else:
+            delay = 3.0
     
     return search_docs
 
@@ -716,7 +898,8 @@ async def pubmed_search_async(search_queries, top_k_results=5, email=None, api_k
         try:
             # print(f"Processing PubMed query: '{query}'")
             
-            # Create PubMed wrapper for the query
+            # A fresh wrapper per query: the wrapper doubles its sleep_time on every
+            # 429 and never resets it, so a shared instance would slow all later queries
             wrapper = PubMedAPIWrapper(
                 top_k_results=top_k_results,
                 doc_content_chars_max=doc_content_chars_max,
@@ -725,10 +908,10 @@ async def pubmed_search_async(search_queries, top_k_results=5, email=None, api_k
             )
             
             # Run the synchronous wrapper in a thread pool
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             
             # Use wrapper.lazy_load instead of load to get better visibility
-            docs = await loop.run_in_executor(None, lambda: list(wrapper.lazy_load(query)))
+            docs = await loop.run_in_executor(_SEARCH_EXECUTOR, lambda: list(wrapper.lazy_load(query)))
             
             print(f"Query '{query}' returned {len(docs)} results")
             
@@ -777,8 +960,8 @@ async def pubmed_search_async(search_queries, top_k_results=5, email=None, api_k
             # Handle exceptions with more detailed information
             error_msg = f"Error processing PubMed query '{query}': {str(e)}"
             print(error_msg)
-            import traceback
-            print(traceback.format_exc())  # Print full traceback for debugging
+            if DEBUG_TRACEBACKS:
+                print(traceback.format_exc())  # Print full traceback for debugging
             
             return {
                 'query': query,
@@ -789,42 +972,29 @@ async def pubmed_search_async(search_queries, top_k_results=5, email=None, api_k
                 'error': str(e)
             }
     
-    # Process all queries with a reasonable delay between them
-    search_docs = []
+    # Process queries one at a time. Each query issues an esearch plus one efetch per result,
+    # so after a query wait long enough for all of its requests to fit NCBI's limit
+    # (3 requests/s anonymously, 10/s with an API key)
+    request_interval = 1 / 10 if api_key else 1 / 3
     
-    # Start with a small delay that increases if we encounter rate limiting
-    delay = 1.0  # Start with a more conservative delay
+    # The esearch call does not retry on 429s, so back off further after a failed query
+    error_delay = 1.0
     
+    search_docs = []
     for i, query in enumerate(search_queries):
-        try:
-            # Add delay between requests
-            if i > 0:  # Don't delay the first request
-                # print(f"Waiting {delay} seconds before next query...")
-                await asyncio.sleep(delay)
-            
-            result = await process_single_query(query)
-            search_docs.append(result)
-            
-            # If query was successful with results, we can slightly reduce delay (but not below minimum)
-            if result.get('results') and len(result['results']) > 0:
-                delay = max(0.5, delay * 0.9)  # Don't go below 0.5 seconds
-            
-        except Exception as e:
-            # Handle exceptions gracefully
-            error_msg = f"Error in main loop processing PubMed query '{query}': {str(e)}"
-            print(error_msg)
-            
-            search_docs.append({
-                'query': query,
-                'follow_up_questions': None,
-                'answer': None,
-                'images': [],
-                'results': [],
-                'error': str(e)
-            })
-            
-            # If we hit an exception, increase delay for next query
-            delay = min(5.0, delay * 1.5)  # Don't exceed 5 seconds
+        result = await process_single_query(query)
+        search_docs.append(result)
+        
+        if i == len(search_queries) - 1:
+            break
+        
+        delay = request_interval * (1 + len(result['results']))
+        if result.get('error'):
+            delay = max(delay, error_delay)
+            error_delay = min(5.0, error_delay * 1.5)  # Don't exceed 5 seconds
+        else:
+            error_delay = 1.0
+        await asyncio.sleep(delay)
     
     return search_docs
 
@@ -908,9 +1078,6 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
         openssl_version = f"OpenSSL/{random.randint(1, 3)}.{random.randint(0, 4)}.{random.randint(0, 9)}"
         return f"{lynx_version} {libwww_version} {ssl_mm_version} {openssl_version}"
     
-    # Create executor for running synchronous operations
-    executor = None if use_api else concurrent.futures.ThreadPoolExecutor(max_workers=5)
-    
     # Use a semaphore to limit concurrent requests
     semaphore = asyncio.Semaphore(5 if use_api else 2)
     
@@ -921,6 +1088,8 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                 
                 # API-based search
                 if use_api:
+                    # Shared session so pagination reuses pooled connections
+                    session = get_http_session()
                     # The API returns up to 10 results per request
                     for start_index in range(1, max_results + 1, 10):
                         # Calculate how many results to request in this batch
@@ -936,25 +1105,24 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                         }
                         print(f"Requesting {num} results for '{query}' from Google API...")
 
-                        async with aiohttp.ClientSession() as session:
-                            async with session.get('https://www.googleapis.com/customsearch/v1', params=params) as response:
-                                if response.status != 200:
-                                    error_text = await response.text()
-                                    print(f"API error: {response.status}, {error_text}")
-                                    break
-                                    
-                                data = await response.json()
+                        async with session.get('https://www.googleapis.com/customsearch/v1', params=params) as response:
+                            if response.status != 200:
+                                error_text = await response.text()
+                                print(f"API error: {response.status}, {error_text}")
+                                break
                                 
-                                # Process search results
-                                for item in data.get('items', []):
-                                    result = {
-                                        "title": item.get('title', ''),
-                                        "url": item.get('link', ''),
-                                        "content": item.get('snippet', ''),
-                                        "score": None,
-                                        "raw_content": item.get('snippet', '')
-                                    }
-                                    results.append(result)
+                            data = await response.json()
+                            
+                            # Process search results
+                            for item in data.get('items', []):
+                                result = {
+                                    "title": item.get('title', ''),
+                                    "url": item.get('link', ''),
+                                    "content": item.get('snippet', ''),
+                                    "score": None,
+                                    "raw_content": item.get('snippet', '')
+                                }
+                                results.append(result)
                         
                         # Respect API quota with a small delay
                         await asyncio.sleep(0.2)
@@ -970,7 +1138,7 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                     print(f"Scraping Google for '{query}'...")
 
                     # Define scraping function
-                    def google_search(query, max_results):
+                    async def google_search(query, max_results, session):
                         try:
                             lang = "en"
                             safe = "active"
@@ -981,8 +1149,8 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                             
                             while fetched_results < max_results:
                                 # Send request to Google
-                                resp = requests.get(
-                                    url="https://www.google.com/search",
+                                async with session.get(
+                                    "https://www.google.com/search",
                                     headers={
                                         "User-Agent": get_useragent(),
                                         "Accept": "*/*"
@@ -997,12 +1165,14 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                                     cookies = {
                                         'CONSENT': 'PENDING+987',  # Bypasses the consent page
                                         'SOCS': 'CAESHAgBEhIaAB',
-                                    }
-                                )
-                                resp.raise_for_status()
+                                    },
+                                    timeout=aiohttp.ClientTimeout(total=10)
+                                ) as resp:
+                                    resp.raise_for_status()
+                                    html = await resp.text()
                                 
                                 # Parse results
-                                soup = BeautifulSoup(resp.text, "html.parser")
+                                soup = BeautifulSoup(html, "html.parser", parse_only=_GOOGLE_RESULT_STRAINER)
                                 result_block = soup.find_all("div", class_="ezO2md")
                                 new_results = 0
                                 
@@ -1012,9 +1182,10 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                                     description_tag = result.find("span", class_="FrIlee")
                                     
                                     if link_tag and title_tag and description_tag:
-                                        link = unquote(link_tag["href"].split("&")[0].replace("/url?q=", ""))
+                                        # Google wraps targets as /url?q=<target>&...; parse_qs also unquotes it
+                                        link = parse_qs(urlparse(link_tag["href"]).query).get("q", [""])[0]
                                         
-                                        if link in fetched_links:
+                                        if not link or link in fetched_links:
                                             continue
                                         
                                         fetched_links.add(link)
@@ -1040,7 +1211,7 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                                     break
                                     
                                 start += 10
-                                time.sleep(1)  # Delay between pages
+                                await asyncio.sleep(1)  # Delay between pages
                             
                             return search_results
                                 
@@ -1048,12 +1219,8 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                             print(f"Error in Google search for '{query}': {str(e)}")
                             return []
                     
-                    # Execute search in thread pool
-                    loop = asyncio.get_running_loop()
-                    search_results = await loop.run_in_executor(
-                        executor, 
-                        lambda: google_search(query, max_results)
-                    )
+                    # Paginate on the event loop over the shared session
+                    search_results = await google_search(query, max_results, get_http_session())
                     
                     # Process the results
                     results = search_results
@@ -1062,48 +1229,49 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                 if include_raw_content and results:
                     content_semaphore = asyncio.Semaphore(3)
                     
-                    async with aiohttp.ClientSession() as session:
-                        fetch_tasks = []
-                        
-                        async def fetch_full_content(result):
-                            async with content_semaphore:
-                                url = result['url']
-                                headers = {
-                                    'User-Agent': get_useragent(),
-                                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                                }
-                                
-                                try:
-                                    await asyncio.sleep(0.2 + random.random() * 0.6)
-                                    async with session.get(url, headers=headers, timeout=10) as response:
-                                        if response.status == 200:
-                                            # Check content type to handle binary files
-                                            content_type = response.headers.get('Content-Type', '').lower()
-                                            
-                                            # Handle PDFs and other binary files
-                                            if 'application/pdf' in content_type or 'application/octet-stream' in content_type:
-                                                # For PDFs, indicate that content is binary and not parsed
-                                                result['raw_content'] = f"[Binary content: {content_type}. Content extraction not supported for this file type.]"
-                                            else:
-                                                try:
-                                                    # Try to decode as UTF-8 with replacements for non-UTF8 characters
-                                                    html = await response.text(errors='replace')
-                                                    soup = BeautifulSoup(html, 'html.parser')
-                                                    result['raw_content'] = soup.get_text()
-                                                except UnicodeDecodeError as ude:
-                                                    # Fallback if we still have decoding issues
-                                                    result['raw_content'] = f"[Could not decode content: {str(ude)}]"
-                                except Exception as e:
-                                    print(f"Warning: Failed to fetch content for {url}: {str(e)}")
-                                    result['raw_content'] = f"[Error fetching content: {str(e)}]"
-                                return result
-                        
-                        for result in results:
-                            fetch_tasks.append(fetch_full_content(result))
-                        
-                        updated_results = await asyncio.gather(*fetch_tasks)
-                        results = updated_results
-                        print(f"Fetched full content for {len(results)} results")
+                    session = get_http_session()
+                    fetch_tasks = []
+                    
+                    async def fetch_full_content(result):
+                        async with content_semaphore:
+                            url = result['url']
+                            headers = {
+                                'User-Agent': get_useragent(),
+                                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+                            }
+                            
+                            try:
+                                await asyncio.sleep(0.2 + random.random() * 0.6)
+                                async with session.get(url, headers=headers, timeout=10) as response:
+                                    if response.status == 200:
+                                        # Check content type to handle binary files
+                                        content_type = response.headers.get('Content-Type', '').lower()
+                                        
+                                        # Handle PDFs, media and other binary files without reading the body
+                                        if content_type.startswith(_BINARY_MIME_PREFIXES):
+                                            # For PDFs, indicate that content is binary and not parsed
+                                            result['raw_content'] = f"[Binary content: {content_type}. Content extraction not supported for this file type.]"
+                                        else:
+                                            try:
+                                                # Decode a capped prefix of the body with replacements for undecodable characters
+                                                html = await _read_capped_text(response)
+                                                result['raw_content'] = await asyncio.get_running_loop().run_in_executor(
+                                                    _PARSE_EXECUTOR, _html_to_text, html
+                                                )
+                                            except UnicodeDecodeError as ude:
+                                                # Fallback if we still have decoding issues
+                                                result['raw_content'] = f"[Could not decode content: {str(ude)}]"
+                            except Exception as e:
+                                print(f"Warning: Failed to fetch content for {url}: {str(e)}")
+                                result['raw_content'] = f"[Error fetching content: {str(e)}]"
+                            return result
+                    
+                    for result in results:
+                        fetch_tasks.append(fetch_full_content(result))
+                    
+                    updated_results = await asyncio.gather(*fetch_tasks)
+                    results = updated_results
+                    print(f"Fetched full content for {len(results)} results")
                 
                 return {
                     "query": query,
@@ -1122,18 +1290,13 @@ async def google_search_async(search_queries: Union[str, List[str]], max_results
                     "results": []
                 }
     
-    try:
-        # Create tasks for all search queries
-        search_tasks = [search_single_query(query) for query in search_queries]
-        
-        # Execute all searches concurrently
-        search_results = await asyncio.gather(*search_tasks)
-        
-        return search_results
-    finally:
-        # Only shut down executor if it was created
-        if executor:
-            executor.shutdown(wait=False)
+    # Create tasks for all search queries
+    search_tasks = [search_single_query(query) for query in search_queries]
+    
+    # Execute all searches concurrently
+    search_results = await asyncio.gather(*search_tasks)
+    
+    return search_results
 
 async def scrape_pages(titles: List[str], urls: List[str]) -> str:
     """
@@ -1141,7 +1304,7 @@ async def scrape_pages(titles: List[str], urls: List[str]) -> str:
     
     This function:
     1. Takes a list of page titles and URLs
-    2. Makes asynchronous HTTP requests to each URL
+    2. Makes concurrent asynchronous HTTP requests to each URL
     3. Converts HTML content to markdown
     4. Formats all content with clear source attribution
     
@@ -1154,45 +1317,50 @@ async def scrape_pages(titles: List[str], urls: List[str]) -> str:
              with clear section dividers and source attribution
     """
     
-    # Create an async HTTP client
-    async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-        pages = []
-        
-        # Fetch each URL and convert to markdown
-        for url in urls:
+    # Drop repeated URLs (e.g. hits shared by several queries) before fetching, keeping the first title
+    title_by_url = {}
+    for title, url in zip(titles, urls):
+        title_by_url.setdefault(url, title)
+    urls = list(title_by_url)
+    titles = list(title_by_url.values())
+    
+    # Reuse the shared HTTP session so repeated hosts keep their connections
+    session = get_http_session()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    
+    # Fetch a single URL and convert it to markdown
+    async def fetch_page(url: str) -> str:
+        async with semaphore:
             try:
-                # Fetch the content
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                # Convert HTML to markdown if successful
-                if response.status_code == 200:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    response.raise_for_status()
+                    
                     # Handle different content types
                     content_type = response.headers.get('Content-Type', '')
                     if 'text/html' in content_type:
-                        # Convert HTML to markdown
-                        markdown_content = markdownify(response.text)
-                        pages.append(markdown_content)
-                    else:
-                        # For non-HTML content, just mention the content type
-                        pages.append(f"Content type: {content_type} (not converted to markdown)")
-                else:
-                    pages.append(f"Error: Received status code {response.status_code}")
-        
+                        # Convert HTML to markdown off the event loop
+                        html = await _read_capped_text(response)
+                        return await asyncio.get_running_loop().run_in_executor(_PARSE_EXECUTOR, _MARKDOWN_CONVERTER.convert, html)
+                    # For non-HTML content, just mention the content type
+                    return f"Content type: {content_type} (not converted to markdown)"
+            
             except Exception as e:
                 # Handle any exceptions during fetch
-                pages.append(f"Error fetching URL: {str(e)}")
-        
-        # Create formatted output
-        formatted_output = f"Search results: \n\n"
-        
-        for i, (title, url, page) in enumerate(zip(titles, urls, pages)):
-            formatted_output += f"\n\n--- SOURCE {i+1}: {title} ---\n"
-            formatted_output += f"URL: {url}\n\n"
-            formatted_output += f"FULL CONTENT:\n {page}"
-            formatted_output += "\n\n" + "-" * 80 + "\n"
+                return f"Error fetching URL: {str(e)}"
+    
+    # Fetch all URLs concurrently; gather keeps pages in URL order
+    pages = await asyncio.gather(*(fetch_page(url) for url in urls))
+    
+    # Create formatted output
+    parts = ["Search results: \n\n"]
+    
+    for i, (title, url, page) in enumerate(zip(titles, urls, pages)):
+        parts.append(f"\n\n--- SOURCE {i+1}: {title} ---\n")
+        parts.append(f"URL: {url}\n\n")
+        parts.append(f"FULL CONTENT:\n {page}")
+        parts.append(SOURCE_END_SEPARATOR)
         
-    return formatted_output
+    return "".join(parts)
 
 @tool
 async def duckduckgo_search(search_queries: List[str]):
@@ -1205,99 +1373,97 @@ async def duckduckgo_search(search_queries: List[str]):
         str: A formatted string of search results
     """
     
+    def perform_search(search_query):
+        # Synchronous DDGS call, run in the search thread pool
+        with DDGS() as ddgs:
+            return list(ddgs.text(search_query, max_results=5))
+    
     async def process_single_query(query):
-        # Execute synchronous search in the event loop's thread pool
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
+        max_retries = 3
+        backoff_factor = 2.0
+        last_exception = None
         
-        def perform_search():
-            max_retries = 3
-            retry_count = 0
-            backoff_factor = 2.0
-            last_exception = None
+        for retry_count in range(max_retries + 1):
+            # Change query slightly and add delay between retries
+            if retry_count > 0:
+                # Random delay with exponential backoff, without holding a worker thread
+                delay = backoff_factor ** retry_count + random.random()
+                print(f"Retry {retry_count}/{max_retries} for query '{query}' after {delay:.2f}s delay")
+                await asyncio.sleep(delay)
+                
+                # Add a random element to the query to bypass caching/rate limits
+                modifiers = ['about', 'info', 'guide', 'overview', 'details', 'explained']
+                modified_query = f"{query} {random.choice(modifiers)}"
+            else:
+                modified_query = query
             
-            while retry_count <= max_retries:
-                try:
-                    results = []
-                    with DDGS() as ddgs:
-                        # Change query slightly and add delay between retries
-                        if retry_count > 0:
-                            # Random delay with exponential backoff
-                            delay = backoff_factor ** retry_count + random.random()
-                            print(f"Retry {retry_count}/{max_retries} for query '{query}' after {delay:.2f}s delay")
-                            time.sleep(delay)
-                            
-                            # Add a random element to the query to bypass caching/rate limits
-                            modifiers = ['about', 'info', 'guide', 'overview', 'details', 'explained']
-                            modified_query = f"{query} {random.choice(modifiers)}"
-                        else:
-                            modified_query = query
-                        
-                        # Execute search
-                        ddg_results = list(ddgs.text(modified_query, max_results=5))
-                        
-                        # Format results
-                        for i, result in enumerate(ddg_results):
-                            results.append({
-                                'title': result.get('title', ''),
-                                'url': result.get('href', ''),
-                                'content': result.get('body', ''),
-                                'score': 1.0 - (i * 0.1),  # Simple scoring mechanism
-                                'raw_content': result.get('body', '')
-                            })
-                        
-                        # Return successful results
-                        return {
-                            'query': query,
-                            'follow_up_questions': None,
-                            'answer': None,
-                            'images': [],
-                            'results': results
-                        }
-                except Exception as e:
-                    # Store the exception and retry
-                    last_exception = e
-                    retry_count += 1
-                    print(f"DuckDuckGo search error: {str(e)}. Retrying {retry_count}/{max_retries}")
-                    
-                    # If not a rate limit error, don't retry
-                    if "Ratelimit" not in str(e) and retry_count >= 1:
-                        print(f"Non-rate limit error, stopping retries: {str(e)}")
-                        break
+            try:
+                # Execute search
+                ddg_results = await loop.run_in_executor(_SEARCH_EXECUTOR, perform_search, modified_query)
+            except Exception as e:
+                # Store the exception and retry
+                last_exception = e
+                print(f"DuckDuckGo search error: {str(e)}. Retrying {retry_count + 1}/{max_retries}")
+                
+                # If not a rate limit error, don't retry
+                if "Ratelimit" not in str(e):
+                    print(f"Non-rate limit error, stopping retries: {str(e)}")
+                    break
+                continue
+            
+            # Format results
+            results = [
+                {
+                    'title': result.get('title', ''),
+                    'url': result.get('href', ''),
+                    'content': result.get('body', ''),
+                    'score': 1.0 - (i * 0.1),  # Simple scoring mechanism
+                    'raw_content': result.get('body', '')
+                }
+                for i, result in enumerate(ddg_results)
+            ]
             
-            # If we reach here, all retries failed
-            print(f"All retries failed for query '{query}': {str(last_exception)}")
-            # Return empty results but with query info preserved
+            # Return successful results
             return {
                 'query': query,
                 'follow_up_questions': None,
                 'answer': None,
                 'images': [],
-                'results': [],
-                'error': str(last_exception)
+                'results': results
             }
-            
-        return await loop.run_in_executor(None, perform_search)
-
-    # Process queries with delay between them to reduce rate limiting
-    search_docs = []
+        
+        # If we reach here, all retries failed
+        print(f"All retries failed for query '{query}': {str(last_exception)}")
+        # Return empty results but with query info preserved
+        return {
+            'query': query,
+            'follow_up_questions': None,
+            'answer': None,
+            'images': [],
+            'results': [],
+            'error': str(last_exception)
+        }
+    
+    # Run queries concurrently, two at a time with staggered starts to reduce rate limiting
+    semaphore = asyncio.Semaphore(2)
+    
+    async def run_query(i, query):
+        if i > 0:  # Don't delay the first query
+            await asyncio.sleep(i * 1.5)
+        async with semaphore:
+            return await process_single_query(query)
+    
+    search_docs = await asyncio.gather(*(run_query(i, query) for i, query in enumerate(search_queries)))
+    
+    # Safely extract URLs and titles from results, handling empty result cases
     urls = []
     titles = []
-    for i, query in enumerate(search_queries):
-        # Add delay between queries (except first one)
-        if i > 0:
-            delay = 2.0 + random.random() * 2.0  # Random delay 2-4 seconds
-            await asyncio.sleep(delay)
-        
-        # Process the query
-        result = await process_single_query(query)
-        search_docs.append(result)
-        
-        # Safely extract URLs and titles from results, handling empty result cases
-        if result['results'] and len(result['results']) > 0:
-            for res in result['results']:
-                if 'url' in res and 'title' in res:
-                    urls.append(res['url'])
-                    titles.append(res['title'])
+    for result in search_docs:
+        for res in result['results']:
+            if 'url' in res and 'title' in res:
+                urls.append(res['url'])
+                titles.append(res['title'])
     
     # If we got any valid URLs, scrape the pages
     if urls:
@@ -1338,7 +1504,7 @@ async def tavily_search(
     )
 
     # Format the search results directly using the raw_content already provided
-    formatted_output = f"Search results: \n\n"
+    parts = ["Search results: \n\n"]
     
     # Deduplicate results by URL
     unique_results = {}
@@ -1348,9 +1514,6 @@ async def tavily_search(
             if url not in unique_results:
                 unique_results[url] = {**result, "query": response['query']}
 
-    async def noop():
-        return None
-
     configurable = WorkflowConfiguration.from_runnable_config(config)
     max_char_to_include = 30_000
     # TODO: share this behavior across all search implementations / tools
@@ -1366,24 +1529,40 @@ async def tavily_search(
             max_retries=configurable.max_structured_output_retries,
             **extra_kwargs
         )
-        summarization_tasks = [
-            noop() if not result.get("raw_content") else summarize_webpage(summarization_model, result['raw_content'][:max_char_to_include])
-            for result in unique_results.values()
+        # Cap concurrent LLM calls to stay within provider rate limits
+        semaphore = asyncio.Semaphore(5)
+
+        async def summarize(raw_content: str) -> str:
+            async with semaphore:
+                return await summarize_webpage(summarization_model, raw_content[:max_char_to_include])
+
+        # Only pages with enough raw_content are summarized; the rest keep their own content
+        urls_to_summarize = [
+            url for url, result in unique_results.items()
+            if len(result.get("raw_content") or "") >= MIN_CHARS_TO_SUMMARIZE
         ]
-        summaries = await asyncio.gather(*summarization_tasks)
+        summaries = await asyncio.gather(*(summarize(unique_results[url]['raw_content']) for url in urls_to_summarize))
+        summary_by_url = dict(zip(urls_to_summarize, summaries))
         unique_results = {
-            url: {'title': result['title'], 'content': result['content'] if summary is None else summary}
-            for url, result, summary in zip(unique_results.keys(), unique_results.values(), summaries)
+            url: {'title': result['title'], 'content': summary_by_url.get(url) or result.get('raw_content') or result['content']}
+            for url, result in unique_results.items()
         }
     elif configurable.process_search_results == "split_and_rerank":
-        embeddings = init_embeddings("openai:text-embedding-3-small")
-        results_by_query = itertools.groupby(unique_results.values(), key=lambda x: x['query'])
-        all_retrieved_docs = []
-        for query, query_results in results_by_query:
-            query_results_list = list(query_results)
-            max_chunks = 2 * len(query_results_list) # 两倍于查询结果数量
-            retrieved_docs = await split_and_rerank_search_results(embeddings, query, query_results_list, max_chunks=max_chunks)
-            all_retrieved_docs.extend(retrieved_docs)
+        embeddings = get_rerank_embeddings()
+        # 按查询分组（结果未按查询排序，groupby 会把同一查询拆成多组）
+        results_by_query: defaultdict[str, list[dict]] = defaultdict(list)
+        for result in unique_results.values():
+            results_by_query[result['query']].append(result)
+
+        # 各查询互不依赖，并发分割和重排
+        retrieved_docs_by_query = await asyncio.gather(*(
+            split_and_rerank_search_results(
+                embeddings, query, query_results_list,
+                max_chunks=2 * len(query_results_list)  # 两倍于查询结果数量
+            )
+            for query, query_results_list in results_by_query.items()
+        ))
+        all_retrieved_docs = [doc for retrieved_docs in retrieved_docs_by_query for doc in retrieved_docs]
 
         stitched_docs = stitch_documents_by_url(all_retrieved_docs)
         unique_results = {
@@ -1393,15 +1572,15 @@ async def tavily_search(
 
     # Format the unique results
     for i, (url, result) in enumerate(unique_results.items()):
-        formatted_output += f"\n\n--- SOURCE {i+1}: {result['title']} ---\n"
-        formatted_output += f"URL: {url}\n\n"
-        formatted_output += f"SUMMARY:\n{result['content']}\n\n"
+        parts.append(f"\n\n--- SOURCE {i+1}: {result['title']} ---\n")
+        parts.append(f"URL: {url}\n\n")
+        parts.append(f"SUMMARY:\n{result['content']}\n\n")
         if result.get('raw_content'):
-            formatted_output += f"FULL CONTENT:\n{result['raw_content'][:max_char_to_include]}"  # Limit content size
-        formatted_output += "\n\n" + "-" * 80 + "\n"
+            parts.append(f"FULL CONTENT:\n{result['raw_content'][:max_char_to_include]}")  # Limit content size
+        parts.append(SOURCE_END_SEPARATOR)
     
     if unique_results:
-        return formatted_output
+        return "".join(parts)
     else:
         return "No valid search results found. Please try different search queries or use a different search API."
 
@@ -1426,7 +1605,7 @@ async def azureaisearch_search(queries: List[str], max_results: int = 5, topic:
     )
 
     # Format the search results directly using the raw_content already provided
-    formatted_output = f"Search results: \n\n"
+    parts = ["Search results: \n\n"]
     
     # Deduplicate results by URL
     unique_results = {}
@@ -1438,15 +1617,15 @@ async def azureaisearch_search(queries: List[str], max_results: int = 5, topic:
     
     # Format the unique results
     for i, (url, result) in enumerate(unique_results.items()):
-        formatted_output += f"\n\n--- SOURCE {i+1}: {result['title']} ---\n"
-        formatted_output += f"URL: {url}\n\n"
-        formatted_output += f"SUMMARY:\n{result['content']}\n\n"
+        parts.append(f"\n\n--- SOURCE {i+1}: {result['title']} ---\n")
+        parts.append(f"URL: {url}\n\n")
+        parts.append(f"SUMMARY:\n{result['content']}\n\n")
         if result.get('raw_content'):
-            formatted_output += f"FULL CONTENT:\n{result['raw_content'][:30000]}"  # Limit content size
-        formatted_output += "\n\n" + "-" * 80 + "\n"
+            parts.append(f"FULL CONTENT:\n{result['raw_content'][:30000]}")  # Limit content size
+        parts.append(SOURCE_END_SEPARATOR)
     
     if unique_results:
-        return formatted_output
+        return "".join(parts)
     else:
         return "No valid search results found. Please try different search queries or use a different search API."
 
@@ -1473,7 +1652,7 @@ async def select_and_execute_search(search_api: str, query_list: list[str], para
         # DuckDuckGo search tool used with both workflow and agent 
         return await duckduckgo_search.ainvoke({'search_queries': query_list})
     elif search_api == "perplexity":
-        search_results = perplexity_search(query_list, **params_to_pass)
+        search_results = await perplexity_search_async(query_list, **params_to_pass)
     elif search_api == "exa":
         search_results = await exa_search(query_list, **params_to_pass)
     elif search_api == "arxiv":
@@ -1544,54 +1723,53 @@ async def split_and_rerank_search_results(embeddings: Embeddings, query: str, se
     # 创建向量存储
     vector_store = InMemoryVectorStore(embeddings)
     
-    # 分批添加文档以避免token限制，使用asyncio.to_thread避免阻塞
+    # 分批添加文档以避免token限制，使用原生异步接口并发提交各批次
     # 估算每批处理的文档数量：每个chunk约1500字符，保守估计每个token约4字符
     # OpenAI限制300k tokens，为安全起见设置为200k tokens (约50个chunks)
     batch_size = 80
-    
-    for i in range(0, len(all_splits), batch_size):
-        batch = all_splits[i:i + batch_size]
-        try:
-            # 使用 run_in_executor 将同步操作转为异步，避免阻塞事件循环
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, lambda: vector_store.add_documents(documents=batch))
-            print(f"Added {len(batch)} chunks to vector store")
-        except Exception as e:
-            # 如果批次仍然太大，进一步减小批次
-            if "max_tokens_per_request" in str(e):
-                # 尝试更小的批次大小
+    # 限制同时进行的embedding请求数
+    semaphore = asyncio.Semaphore(4)
+
+    async def add_batch(start: int):
+        batch = all_splits[start:start + batch_size]
+        async with semaphore:
+            try:
+                await vector_store.aadd_documents(documents=batch)
+                print(f"Added {len(batch)} chunks to vector store")
+            except Exception as e:
+                # 如果是其他错误，重新抛出
+                if "max_tokens_per_request" not in str(e):
+                    raise
+                # 如果批次仍然太大，进一步减小批次
                 smaller_batch_size = 50
-                for j in range(i, min(i + batch_size, len(all_splits)), smaller_batch_size):
+                for j in range(start, min(start + batch_size, len(all_splits)), smaller_batch_size):
                     smaller_batch = all_splits[j:j + smaller_batch_size]
                     try:
-                        loop = asyncio.get_event_loop()
-                        await loop.run_in_executor(None, lambda: vector_store.add_documents(documents=smaller_batch))
+                        await vector_store.aadd_documents(documents=smaller_batch)
                     except Exception as inner_e:
                         # 如果还是失败，跳过这批文档并记录警告
                         print(f"Warning: Skipped batch {j//smaller_batch_size + 1} due to token limit: {inner_e}")
-                        continue
-            else:
-                # 如果是其他错误，重新抛出
-                raise e
 
-    # 检索相关chunks，同样使用异步方式避免阻塞
-    loop = asyncio.get_event_loop()
-    retrieved_docs = await loop.run_in_executor(None, lambda: vector_store.similarity_search(query, k=max_chunks))
+    await asyncio.gather(*(add_batch(i) for i in range(0, len(all_splits), batch_size)))
+
+    # 检索相关chunks，使用原生异步接口避免阻塞
+    retrieved_docs = await vector_store.asimilarity_search(query, k=max_chunks)
     return retrieved_docs
 
 
 def stitch_documents_by_url(documents: list[Document]) -> list[Document]:
     url_to_docs: defaultdict[str, list[Document]] = defaultdict(list)
-    url_to_snippet_hashes: defaultdict[str, set[str]] = defaultdict(set)
+    # Exact in-process dedup, so the snippet text itself is the set key (str caches its own hash)
+    url_to_snippets: defaultdict[str, set[str]] = defaultdict(set)
     for doc in documents:
-        snippet_hash = hashlib.sha256(doc.page_content.encode()).hexdigest()
+        snippet = doc.page_content
         url = doc.metadata['url']
         # deduplicate snippets by the content
-        if snippet_hash in url_to_snippet_hashes[url]:
+        if snippet in url_to_snippets[url]:
             continue
 
         url_to_docs[url].append(doc)
-        url_to_snippet_hashes[url].add(snippet_hash)
+        url_to_snippets[url].add(snippet)
 
     # stitch retrieved chunks into a single doc per URL
     stitched_docs = []
@@ -1621,18 +1799,19 @@ async def load_mcp_server_config(path: str) -> dict:
     config = await asyncio.to_thread(_load)
     return config
 
-def parse_position(position: str) -> List[int]:
+@lru_cache(maxsize=4096)
+def parse_position(position: str) -> Tuple[int, ...]:
     """
-    解析位置编号为数字列表
+    解析位置编号为数字元组（结果会被缓存，同一编号在一次调整中会被多次解析）
     
     Args:
         position: 位置编号，如 "1", "2.1", "3.2.1"
         
     Returns:
-        数字列表，如 [1], [2, 1], [3, 2, 1]
+        数字元组，如 (1,), (2, 1), (3, 2, 1)
     """
     try:
-        return [int(x) for x in position.split('.')]
+        return tuple(int(x) for x in position.split('.'))
     except ValueError:
         raise ValueError(f"Invalid position format: {position}")
 
@@ -1686,9 +1865,8 @@ def get_parent_and_index_by_position(outline_nodes: List[OutlineNode], position:
             # 顶层节点
             return None, outline_nodes, path[0] - 1  # 转换为0-based索引
         
-        # 找到父节点
-        parent_path = path[:-1]
-        parent_position = '.'.join(str(x) for x in parent_path)
+        # 找到父节点（去掉最后一级编号即为父节点编号）
+        parent_position = position.rsplit('.', 1)[0]
         parent_node = find_node_by_position(outline_nodes, parent_position)
         
         if parent_node is None:
@@ -1710,7 +1888,31 @@ def get_level_from_position(position: str) -> int:
     Returns:
         节点层级 (1, 2, 或 3)
     """
-    return len(position.split('.'))
+    return position.count('.') + 1
+
+def _build_position_index(nodes: list, prefix: Tuple[int, ...] = (), index: Optional[Dict] = None) -> Dict[Tuple[int, ...], Tuple[list, int]]:
+    """
+    一次遍历建立位置索引，避免每个操作都从根节点重新查找
+    
+    Returns:
+        位置元组 -> (所在节点列表, 0-based索引)，如 (2, 1) -> (第2个节点的 leaf_nodes, 0)
+    """
+    if index is None:
+        index = {}
+    for i, node in enumerate(nodes):
+        position = prefix + (i + 1,)
+        index[position] = (nodes, i)
+        children = getattr(node, 'leaf_nodes', None)
+        if children:
+            _build_position_index(children, position, index)
+    return index
+
+def _position_sort_key(position: str) -> Tuple[int, ...]:
+    """按数字层级排序位置编号（"2.10" 排在 "2.9" 之后）；无效编号视为最小值，执行时再单独报错"""
+    try:
+        return parse_position(position)
+    except ValueError:
+        return ()
 
 def execute_position_based_adjustments(outline_nodes: List[OutlineNode], adjustments: List) -> List[OutlineNode]:
     """
@@ -1723,8 +1925,11 @@ def execute_position_based_adjustments(outline_nodes: List[OutlineNode], adjustm
     Returns:
         调整后的大纲节点列表
     """
-    # 创建副本避免修改原始数据
-    working_nodes = copy.deepcopy(outline_nodes)
+    # 创建副本避免修改原始数据：节点字段都是不可变值，只需复制节点对象和列表，无需 deepcopy
+    working_nodes = [
+        node.model_copy(update={"leaf_nodes": [leaf.model_copy() for leaf in node.leaf_nodes]})
+        for node in outline_nodes
+    ]
     
     # 按操作类型分组处理：先删除，再修改，最后添加
     # 这样可以避免位置编号在操作过程中发生变化
@@ -1733,24 +1938,27 @@ def execute_position_based_adjustments(outline_nodes: List[OutlineNode], adjustm
     add_ops = [adj for adj in adjustments if adj.action == "add"]
     
     # 删除操作（按位置倒序执行，避免索引变化）
-    delete_ops.sort(key=lambda x: x.position, reverse=True)
+    # 倒序执行时，后面的兄弟节点和子节点总是先被删除，所以删除前建立的索引始终有效
+    delete_ops.sort(key=lambda x: _position_sort_key(x.position), reverse=True)
+    position_index = _build_position_index(working_nodes)
     for adjustment in delete_ops:
         try:
-            _delete_node_by_position(working_nodes, adjustment.position)
+            _delete_node_by_position(position_index, adjustment.position)
         except Exception as e:
             print(f"Failed to delete node at position {adjustment.position}: {e}")
             continue
     
-    # 修改操作
+    # 修改操作（不改变结构，删除后重建一次索引即可）
+    position_index = _build_position_index(working_nodes)
     for adjustment in modify_ops:
         try:
-            _modify_node_by_position(working_nodes, adjustment.position, adjustment.new_title)
+            _modify_node_by_position(position_index, adjustment.position, adjustment.new_title)
         except Exception as e:
             print(f"Failed to modify node at position {adjustment.position}: {e}")
             continue
     
-    # 添加操作（按位置正序执行）
-    add_ops.sort(key=lambda x: x.position)
+    # 添加操作（按位置正序执行；每次插入都会改变后续编号，所以仍按树逐个查找）
+    add_ops.sort(key=lambda x: _position_sort_key(x.position))
     for adjustment in add_ops:
         try:
             _add_node_by_position(working_nodes, adjustment.position, adjustment.new_title)
@@ -1760,22 +1968,26 @@ def execute_position_based_adjustments(outline_nodes: List[OutlineNode], adjustm
     
     return working_nodes
 
-def _delete_node_by_position(outline_nodes: List[OutlineNode], position: str):
+def _delete_node_by_position(position_index: Dict[Tuple[int, ...], Tuple[list, int]], position: str):
     """删除指定位置的节点"""
-    parent_node, target_list, index = get_parent_and_index_by_position(outline_nodes, position)
+    entry = position_index.get(parse_position(position))
     
-    if index < 0 or index >= len(target_list):
+    if entry is None or entry[1] >= len(entry[0]):
         raise ValueError(f"Invalid position: {position}")
     
+    target_list, index = entry
     del target_list[index]
 
-def _modify_node_by_position(outline_nodes: List[OutlineNode], position: str, new_title: Optional[str]):
+def _modify_node_by_position(position_index: Dict[Tuple[int, ...], Tuple[list, int]], position: str, new_title: Optional[str]):
     """修改指定位置的节点"""
-    node = find_node_by_position(outline_nodes, position)
+    entry = position_index.get(parse_position(position))
     
-    if node is None:
+    if entry is None:
         raise ValueError(f"Node not found at position: {position}")
     
+    target_list, index = entry
+    node = target_list[index]
+    
     if new_title:
         node.title = new_title
 
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+from influflow.state import OutlineLeafNode, OutlineNode
+from influflow.utils import execute_position_based_adjustments, parse_position
+
+
+def make_leaf(title: str, number: int = 1) -> OutlineLeafNode:
+    return OutlineLeafNode(title=title, tweet_number=number, tweet_content=f"{title} content")
+
+
+def make_section(title: str, leaf_count: int) -> OutlineNode:
+    return OutlineNode(
+        title=title,
+        leaf_nodes=[make_leaf(f"{title}.{i}", i) for i in range(1, leaf_count + 1)],
+    )
+
+
+def adjustment(action: str, position: str, new_title=None) -> SimpleNamespace:
+    return SimpleNamespace(action=action, position=position, new_title=new_title)
+
+
+def titles(nodes) -> list:
+    return [node.title for node in nodes]
+
+
+def test_parse_position_orders_multi_digit_numerically():
+    assert parse_position("2.10") == (2, 10)
+    assert parse_position("2.10") > parse_position("2.9")
+    assert parse_position("10") > parse_position("2")
+
+
+def test_delete_multi_digit_leaf_positions():
+    outline = [make_section("s1", 11)]
+
+    result = execute_position_based_adjustments(
+        outline, [adjustment("delete", "1.9"), adjustment("delete", "1.10")]
+    )
+
+    assert titles(result[0].leaf_nodes) == [
+        f"s1.{i}" for i in range(1, 12) if i not in (9, 10)
+    ]
+
+
+def test_delete_multi_digit_top_level_positions():
+    outline = [make_section(f"s{i}", 1) for i in range(1, 11)]
+
+    result = execute_position_based_adjustments(
+        outline, [adjustment("delete", "2"), adjustment("delete", "10")]
+    )
+
+    assert titles(result) == ["s1", "s3", "s4", "s5", "s6", "s7", "s8", "s9"]
+
+
+def test_delete_parent_together_with_child():
+    outline = [make_section("s1", 2), make_section("s2", 3), make_section("s3", 1)]
+
+    result = execute_position_based_adjustments(
+        outline, [adjustment("delete", "2"), adjustment("delete", "2.1")]
+    )
+
+    assert titles(result) == ["s1", "s3"]
+    assert titles(result[0].leaf_nodes) == ["s1.1", "s1.2"]
+    assert titles(result[1].leaf_nodes) == ["s3.1"]
+
+
+def test_modify_uses_positions_after_deletes():
+    outline = [make_section("s1", 3)]
+
+    result = execute_position_based_adjustments(
+        outline,
+        [adjustment("modify", "1.1", "renamed"), adjustment("delete", "1.1")],
+    )
+
+    assert titles(result[0].leaf_nodes) == ["renamed", "s1.3"]
+    assert result[0].leaf_nodes[0].tweet_content == "s1.2 content"
+
+
+def test_adjustments_leave_input_outline_unchanged():
+    outline = [make_section("s1", 2), make_section("s2", 2)]
+    original = [node.model_dump() for node in outline]
+    original_ids = [id(node) for node in outline]
+
+    result = execute_position_based_adjustments(
+        outline,
+        [
+            adjustment("delete", "1.2"),
+            adjustment("modify", "2.1", "renamed"),
+            adjustment("add", "3", "added"),
+        ],
+    )
+
+    assert titles(result) == ["s1", "s2", "added"]
+    assert [node.model_dump() for node in outline] == original
+    assert [id(node) for node in outline] == original_ids
+    assert all(new is not old for new, old in zip(result, outline))
+    assert result[1].leaf_nodes[0] is not outline[1].leaf_nodes[0]